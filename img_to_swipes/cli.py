@@ -1,22 +1,33 @@
 from __future__ import annotations
 
 import colorsys
-from itertools import cycle
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 from logging import INFO, FileHandler
 from math import ceil
 from typing import Iterator
 
-from PIL.Image import new as pil_new
+import numpy
+from PIL.Image import fromarray as pil_fromarray
 from rich.highlighter import NullHighlighter
 from rich.logging import RichHandler
 from tqdm import tqdm
 from wakepy import keep
 
 from img_to_swipes import config
-from img_to_swipes.geometry import Point, Polygon, Rect, points_to_polygons, polygon_halo, polygons_bounding_rect
+from img_to_swipes.geometry import (
+    PixelMask,
+    Point,
+    Polygon,
+    Rect,
+    points_to_numpy,
+    points_to_polygons,
+    polygon_halo,
+    polygons_bounding_rect,
+)
 from img_to_swipes.image import Image
 from img_to_swipes.log import logger
-from img_to_swipes.swiper import Swiper
+from img_to_swipes.swiper import Swiper, prepare_target_platform
 
 
 def log_config() -> None:
@@ -39,10 +50,11 @@ def log_config() -> None:
 
 def load_image() -> Image:
     logger.info(f"Loading image {config.image_path()}...")
+    canvas_size = config.canvas_rect().size
     image = Image.from_file(
         config.image_path(),
-        config.canvas_rect().size.width,
-        config.canvas_rect().size.height,
+        canvas_size.width,
+        canvas_size.height,
         config.max_luminosity(),
     )
     logger.info(f"Loaded {len(image.pixels)} black pixels from {config.image_path()}")
@@ -55,48 +67,47 @@ def save_image(image: Image) -> None:
     logger.info(f"Saved black pixels to {black_pixels_path}")
 
 
-def make_palette(size: int) -> Iterator[tuple[int, int, int]]:
-    palette = []
+@cache
+def make_palette(size: int) -> numpy.ndarray:
+    palette_np = numpy.empty((size, 3), dtype=numpy.uint8)
     hue_step = 1 / size
     for i in range(size):
         red, green, blue = colorsys.hsv_to_rgb(i * hue_step, 1, 1)
-        palette.append((int(red * 255), int(green * 255), int(blue * 255)))
+        palette_np[i] = (int(red * 255), int(green * 255), int(blue * 255))
 
-    return cycle(palette)
+    return palette_np
 
 
-def save_swipe_image(swipes: list[Polygon]) -> None:
-    palette = make_palette(50)
+def save_swipe_image(swipes: list[Polygon], bounding_rect: Rect) -> None:
+    palette_np = make_palette(50)
 
-    bounding_rect = polygons_bounding_rect(swipes)
-    pil_image = pil_new("RGB", (bounding_rect.size.width, bounding_rect.size.height), color="white")
+    image_np = numpy.full((bounding_rect.size.height, bounding_rect.size.width, 3), 255, dtype=numpy.uint8)
 
-    for swipe in swipes:
-        image_swipe = swipe.offset(-bounding_rect.left, -bounding_rect.top)
-        color = next(palette)
-        for pixel in image_swipe.points:
-            pil_image.putpixel((pixel.x, pixel.y), color)
+    for i, swipe in enumerate(swipes):
+        points_np = swipe.points_np - (bounding_rect.left, bounding_rect.top)
+        image_np[points_np[:, 1], points_np[:, 0]] = palette_np[i % len(palette_np)]
 
     swipes_path = config.artifacts_dir() / "swipes.bmp"
-    pil_image.save(swipes_path)
+    pil_fromarray(image_np).save(swipes_path)
     logger.info(f"Saved swipes to {swipes_path}")
 
 
-def save_swipe_with_margin_image(swipes: list[Polygon]) -> None:
-    palette = make_palette(50)
+def save_swipe_with_margin_image(swipes: list[Polygon], bounding_rect: Rect) -> None:
+    palette_np = make_palette(50)
 
-    bounding_rect = polygons_bounding_rect(swipes)
-    pil_image = pil_new("RGB", (bounding_rect.size.width, bounding_rect.size.height), color="white")
+    image_np = numpy.full((bounding_rect.size.height, bounding_rect.size.width, 3), 255, dtype=numpy.uint8)
 
-    for swipe in swipes:
+    for i, swipe in enumerate(swipes):
         image_swipe = swipe.offset(-bounding_rect.left, -bounding_rect.top)
-        color = next(palette)
-        for pixel in polygon_halo(image_swipe, config.swipe_radius()):
-            if pixel.x >= 0 and pixel.y >= 0 and pixel.x < pil_image.width and pixel.y < pil_image.height:
-                pil_image.putpixel((pixel.x, pixel.y), color)
+        halo = polygon_halo(image_swipe, config.swipe_radius())
+        halo_np = points_to_numpy(halo)
+        xs = halo_np[:, 0]
+        ys = halo_np[:, 1]
+        in_bounds = (xs >= 0) & (ys >= 0) & (xs < image_np.shape[1]) & (ys < image_np.shape[0])
+        image_np[ys[in_bounds], xs[in_bounds]] = palette_np[i % len(palette_np)]
 
     swipes_path = config.artifacts_dir() / "swipes_with_margin.bmp"
-    pil_image.save(swipes_path)
+    pil_fromarray(image_np).save(swipes_path)
     logger.info(f"Saved swipes with margin to {swipes_path}")
 
 
@@ -115,14 +126,13 @@ def make_swipe_queue(image: Image) -> Iterator[Polygon]:
     if config.draw_content_rect():
         yield image.content_bounding_rect.to_polygon().lerp(rect_lerp_step_count)
 
+    swipe_radius = config.swipe_radius()
     unique_pixels = set(image.pixels)
-    unprocessed_pixels: set[Point] = unique_pixels.copy()
-    with tqdm(total=len(unique_pixels), smoothing=1, colour="green", desc="Preparing swipes") as pbar:
-        for polygon in points_to_polygons(unique_pixels, config.swipe_length(), config.swipe_radius()):
-            old_count = len(unprocessed_pixels)
-            unprocessed_pixels.difference_update(polygon_halo(polygon, config.swipe_radius()))
-            new_count = len(unprocessed_pixels)
-            pbar.update(old_count - new_count)
+    unprocessed_pixels = PixelMask.from_points(image.pixels_np)
+    with tqdm(total=unprocessed_pixels.count(), smoothing=1, colour="green", desc="Preparing swipes") as pbar:
+        for polygon in points_to_polygons(unique_pixels, config.swipe_length(), swipe_radius):
+            removed_count = unprocessed_pixels.remove_many(polygon_halo(polygon, swipe_radius))
+            pbar.update(removed_count)
             yield polygon
 
 
@@ -131,7 +141,8 @@ def perform_swipes(swipes: list[Polygon]) -> None:
     dx = config.canvas_rect().left
     dy = config.canvas_rect().top
     for swipe in tqdm(swipes, smoothing=1, colour="green", desc="Performing swipes"):
-        swiper.swipe(swipe.offset(dx, dy))
+        swiper.swipe(swipe, dx, dy)
+    swiper.finish()
 
 
 def configure_logging() -> None:
@@ -147,12 +158,18 @@ def main() -> None:
 
             log_config()
 
-            image = load_image()
-            save_image(image)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                target_platform_future = executor.submit(prepare_target_platform)
+
+                image = load_image()
+                save_image(image)
+
+                swipes = list(make_swipe_queue(image))
+                swipes_bounding_rect = polygons_bounding_rect(swipes)
+                save_swipe_image(swipes, swipes_bounding_rect)
+                save_swipe_with_margin_image(swipes, swipes_bounding_rect)
 
-            swipes = list(make_swipe_queue(image))
-            save_swipe_image(swipes)
-            save_swipe_with_margin_image(swipes)
+                target_platform_future.result()
 
             perform_swipes(swipes)
     except Exception as e:
@@ -1,11 +1,15 @@
 import importlib
 import sys
 from enum import Enum, auto
-from functools import lru_cache
+from functools import cache
 from pathlib import Path
 from typing import Any, TypeVar
 
-import toml
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
 from nodejs import node
 from img_to_swipes.geometry import Point, Rect
 
@@ -21,12 +25,11 @@ class HostPlatform(Enum):
 T = TypeVar("T")
 
 
-@lru_cache
+@cache
 def _config_dict() -> dict[str, Any]:
-    return toml.load(config_path())
+    return tomllib.loads(config_path().read_text(encoding="utf-8"))
 
 
-@lru_cache
 def _config_key(category: str, key: str, key_type: type[T], default: T | None) -> T:
     category_dict = _config_dict().get(category)
     if category_dict is None:
@@ -49,17 +52,17 @@ def _config_key(category: str, key: str, key_type: type[T], default: T | None) -
     return key_value
 
 
-@lru_cache
+@cache
 def root_dir() -> Path:
     return Path(sys.argv[0]).parent.absolute()
 
 
-@lru_cache
+@cache
 def config_path() -> Path:
     return root_dir() / "config.toml"
 
 
-@lru_cache
+@cache
 def host_platform() -> HostPlatform:
     if sys.platform.startswith("linux"):
         return HostPlatform.linux
@@ -73,27 +76,35 @@ def host_platform() -> HostPlatform:
     raise ValueError(f"Unsupported platform: {sys.platform}")
 
 
-@lru_cache
+@cache
 def platform_tools_path() -> Path:
     return root_dir() / "platform_tools" / host_platform().name
 
 
-@lru_cache
+@cache
 def nodejs_path() -> Path:
     return Path(node.path)
 
 
-@lru_cache
+def _cached_import(module_name: str) -> Any:
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+
+    return importlib.import_module(module_name)
+
+
+@cache
 def target_platform() -> ITargetPlatform:
     platform_name = _config_key("target_platform", "name", str, None)
-    platform_module = importlib.import_module(f"img_to_swipes.target_platforms.{platform_name}.target_platform")
+    platform_module = _cached_import(f"img_to_swipes.target_platforms.{platform_name}.target_platform")
     platform = platform_module.TargetPlatform()
     assert isinstance(platform, ITargetPlatform)
 
     return platform
 
 
-@lru_cache
+@cache
 def artifacts_dir() -> Path:
     path = root_dir() / "artifacts"
     path.mkdir(exist_ok=True)
@@ -101,7 +112,7 @@ def artifacts_dir() -> Path:
     return path
 
 
-@lru_cache
+@cache
 def image_path() -> Path:
     path_str = _config_key("image", "path", str, None)
     path = Path(path_str)
@@ -111,22 +122,22 @@ def image_path() -> Path:
     return path
 
 
-@lru_cache
+@cache
 def draw_canvas_rect() -> bool:
     return _config_key("debug", "draw_canvas_rect", bool, False)
 
 
-@lru_cache
+@cache
 def draw_image_rect() -> bool:
     return _config_key("debug", "draw_image_rect", bool, False)
 
 
-@lru_cache
+@cache
 def draw_content_rect() -> bool:
     return _config_key("debug", "draw_content_rect", bool, False)
 
 
-@lru_cache
+@cache
 def max_luminosity() -> int:
     value = _config_key("image", "max_luminosity", int, 200)
     if not (0 <= value <= 255):
@@ -135,7 +146,7 @@ def max_luminosity() -> int:
     return value
 
 
-@lru_cache
+@cache
 def canvas_rect() -> Rect:
     x = _config_key("canvas", "x", int, None)
     y = _config_key("canvas", "y", int, None)
@@ -151,7 +162,7 @@ def canvas_rect() -> Rect:
     return Rect(Point(x, y), Point(x + width, y + height))
 
 
-@lru_cache
+@cache
 def swipe_length() -> int:
     value = _config_key("swipe", "length", int, 200)
     if value <= 0:
@@ -160,7 +171,7 @@ def swipe_length() -> int:
     return value
 
 
-@lru_cache
+@cache
 def swipe_duration() -> int:
     value = _config_key("swipe", "duration", int, 1)
     if value <= 0:
@@ -169,7 +180,7 @@ def swipe_duration() -> int:
     return value
 
 
-@lru_cache
+@cache
 def swipe_radius() -> int:
     value = _config_key("swipe", "radius", int, 2)
     if value <= 0:
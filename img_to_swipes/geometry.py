@@ -1,40 +1,34 @@
 from __future__ import annotations
 
-import math
-from collections import Counter
+from collections import deque
 from dataclasses import dataclass
-from functools import cache, reduce
+from functools import cache, cached_property, reduce
 from itertools import islice, repeat, starmap
-from typing import Callable, Iterable, Iterator
+from typing import Callable, Final, Iterable, Iterator
 
 import cv2
 import numpy
 
+_NEIGHBOR_OFFSETS: Final = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Point:
     x: int
     y: int
 
     @property
-    def neighbors(self) -> Iterator[Point]:
-        yield Point(self.x - 1, self.y)
-        yield Point(self.x + 1, self.y)
-        yield Point(self.x, self.y - 1)
-        yield Point(self.x, self.y + 1)
-        yield Point(self.x - 1, self.y - 1)
-        yield Point(self.x - 1, self.y + 1)
-        yield Point(self.x + 1, self.y - 1)
-        yield Point(self.x + 1, self.y + 1)
+    def neighbors(self) -> tuple[Point, ...]:
+        return tuple(Point(self.x + dx, self.y + dy) for dx, dy in _NEIGHBOR_OFFSETS)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Size:
     width: int
     height: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Rect:
     top_left: Point
     bottom_right: Point
@@ -82,20 +76,22 @@ class Rect:
 class Polygon:
     points: tuple[Point, ...]
 
+    @cached_property
+    def points_np(self) -> numpy.ndarray:
+        return points_to_numpy(self.points)
+
     @property
     def bounding_rect(self) -> Rect:
         if not self.points:
             return Rect(Point(0, 0), Point(0, 0))
 
-        min_x = min(point.x for point in self.points)
-        min_y = min(point.y for point in self.points)
-        max_x = max(point.x for point in self.points)
-        max_y = max(point.y for point in self.points)
+        min_x, min_y = self.points_np.min(axis=0).tolist()
+        max_x, max_y = self.points_np.max(axis=0).tolist()
 
         return Rect(Point(min_x, min_y), Point(max_x, max_y))
 
     def offset(self, dx: int, dy: int) -> Polygon:
-        return Polygon(tuple(Point(point.x + dx, point.y + dy) for point in self.points))
+        return Polygon(tuple(starmap(Point, (self.points_np + (dx, dy)).tolist())))
 
     def split(self, max_length: int) -> Iterator[Polygon]:
         if max_length <= 0:
@@ -111,37 +107,113 @@ class Polygon:
         if len(self.points) <= 1 or steps == 0:
             return Polygon(self.points)
 
-        points_np = numpy.array([(point.x, point.y) for point in self.points])
-        lerp_points_np: list[numpy.ndarray] = []
-        for i in range(len(points_np) - 1):
-            start_point_np = points_np[i]
-            end_point_np = points_np[i + 1]
-            lerp_segment_np = numpy.linspace(start_point_np, end_point_np, steps + 2)
-            lerp_points_np.extend(lerp_segment_np)
+        points_np = self.points_np
+        lerp_points_np = numpy.linspace(points_np[:-1], points_np[1:], steps + 2, axis=1).reshape(-1, 2)
+        rounded_points_np = numpy.round(lerp_points_np).astype(numpy.int32)
 
-        lerp_points = starmap(Point, numpy.round(lerp_points_np).astype(int).tolist())
-        return Polygon(tuple(dict.fromkeys(lerp_points)))
+        _, first_indices = numpy.unique(rounded_points_np, axis=0, return_index=True)
+        unique_points_np = rounded_points_np[numpy.sort(first_indices)]
 
+        return Polygon(tuple(starmap(Point, unique_points_np.tolist())))
 
-def find_contours(points: Iterable[Point]) -> Iterator[Polygon]:
-    unique_points = set(points)
-    if not unique_points:
-        return
 
-    width = max(point.x for point in unique_points) + 1
-    height = max(point.y for point in unique_points) + 1
+def points_to_numpy(points: Iterable[Point]) -> numpy.ndarray:
+    return numpy.array([(point.x, point.y) for point in points], dtype=numpy.int32).reshape(-1, 2)
 
-    mask = numpy.zeros((height, width), dtype=numpy.uint8)
-    for point in unique_points:
-        mask[point.y, point.x] = 255
 
-    contours_raw, _ = cv2.findContours(mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)
+class PixelMask:
+    def __init__(self, width: int, height: int) -> None:
+        if width <= 0 or height <= 0:
+            raise ValueError("Width and height must be greater than 0")
+
+        self._mask: numpy.ndarray = numpy.zeros((height, width), dtype=bool)
+
+    @staticmethod
+    def from_points(points: Iterable[Point] | numpy.ndarray) -> PixelMask:
+        points_np = points if isinstance(points, numpy.ndarray) else points_to_numpy(points)
+        if not len(points_np):
+            return PixelMask(1, 1)
+
+        width, height = points_np.max(axis=0).tolist()
+
+        mask = PixelMask(width + 1, height + 1)
+        mask._mask[points_np[:, 1], points_np[:, 0]] = True
+
+        return mask
+
+    @property
+    def width(self) -> int:
+        return self._mask.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self._mask.shape[0]
+
+    def contains(self, point: Point) -> bool:
+        if point.x < 0 or point.y < 0 or point.x >= self.width or point.y >= self.height:
+            return False
+
+        return bool(self._mask[point.y, point.x])
+
+    def __contains__(self, point: Point) -> bool:
+        return self.contains(point)
+
+    def first_point(self) -> Point:
+        ys, xs = numpy.nonzero(self._mask)
+        if not len(xs):
+            raise ValueError("Mask is empty")
+
+        return Point(int(xs[0]), int(ys[0]))
+
+    def remove_many(self, points: Iterable[Point]) -> int:
+        points_np = points_to_numpy(points)
+        xs = points_np[:, 0]
+        ys = points_np[:, 1]
+        in_bounds = (xs >= 0) & (ys >= 0) & (xs < self.width) & (ys < self.height)
+        rows = ys[in_bounds]
+        cols = xs[in_bounds]
+        removed_count = int(numpy.count_nonzero(self._mask[rows, cols]))
+        self._mask[rows, cols] = False
+
+        return removed_count
+
+    def count(self) -> int:
+        return int(numpy.count_nonzero(self._mask))
+
+    def to_numpy_mask(self) -> numpy.ndarray:
+        return self._mask.astype(numpy.uint8)
+
+
+def find_contours(points: Iterable[Point] | PixelMask) -> Iterator[Polygon]:
+    if not isinstance(points, PixelMask):
+        points = PixelMask.from_points(points)
+
+    mask = points.to_numpy_mask()
+    if not mask.any():
+        return
+
+    contours_raw, _ = cv2.findContours(mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
     for contour_np in contours_raw:
-        contour_points = contour_np.squeeze(axis=1).tolist()
-        if not contour_points:
+        dense_contour_np = _densify_contour(contour_np.reshape(-1, 2))
+        yield Polygon(tuple(starmap(Point, dense_contour_np.tolist())))
+
+
+def _densify_contour(vertices_np: numpy.ndarray) -> numpy.ndarray:
+    closed_np = numpy.concatenate([vertices_np, vertices_np[:1]])
+    segments_np: list[numpy.ndarray] = []
+    for i in range(len(closed_np) - 1):
+        start_np = closed_np[i]
+        end_np = closed_np[i + 1]
+        step_count = int(numpy.abs(end_np - start_np).max())
+        if step_count == 0:
             continue
 
-        yield Polygon(tuple(starmap(Point, contour_points)))
+        segments_np.append(numpy.linspace(start_np, end_np, step_count + 1)[:-1])
+
+    if not segments_np:
+        return vertices_np[:1]
+
+    return numpy.round(numpy.concatenate(segments_np)).astype(numpy.int32)
 
 
 def find_path(start: Point, points: set[Point], max_length: int, predicate: Callable[[Point], bool]) -> Polygon | None:
@@ -153,32 +225,35 @@ def find_path(start: Point, points: set[Point], max_length: int, predicate: Call
             return Polygon((start,))
         return None
 
-    visited = set()
-    queue = [[start]]
+    parents: dict[Point, Point | None] = {start: None}
+    queue = deque([(start, 1)])
 
     while queue:
-        current_path = queue.pop(0)
-        last_point = current_path[-1]
-        assert len(current_path) < max_length
+        current_point, current_length = queue.popleft()
+        assert current_length < max_length
 
-        for neighbor in last_point.neighbors:
+        for neighbor in current_point.neighbors:
             if neighbor not in points:
                 continue
 
-            if neighbor in visited:
+            if neighbor in parents:
                 continue
 
-            if predicate(neighbor):
-                current_path.append(neighbor)
-                return Polygon(tuple(current_path))
+            parents[neighbor] = current_point
 
-            if len(current_path) == max_length - 1:
+            if predicate(neighbor):
+                path = []
+                path_point: Point | None = neighbor
+                while path_point is not None:
+                    path.append(path_point)
+                    path_point = parents[path_point]
+                path.reverse()
+                return Polygon(tuple(path))
+
+            if current_length == max_length - 1:
                 continue
 
-            new_path = current_path.copy()
-            new_path.append(neighbor)
-            queue.append(new_path)
-            visited.add(neighbor)
+            queue.append((neighbor, current_length + 1))
 
     return None
 
@@ -188,15 +263,23 @@ class _PolygonGenerator:
         self._points: set[Point] = points
         self._polygon_length: int = polygon_length
         self._margin: int = margin
-        self._unvisited_points: set[Point] = points.copy()
+        self._unvisited_mask: PixelMask = PixelMask.from_points(points)
+        self._unvisited_count: int = self._unvisited_mask.count()
         self._unvisited_contours: list[Polygon] | None = []
+        self._start_point_stack: list[Point] | None = None
+
+        points_rect = points_bounding_rect(points)
+        self._visit_origin: Point = points_rect.top_left
+        self._visit_count: numpy.ndarray = numpy.zeros((points_rect.size.height, points_rect.size.width), numpy.int32)
+        self._visited_points: list[Point] = []
+        self._max_visit_count: int = 0
 
     def _next_contour(self) -> Polygon | None:
         while self._unvisited_contours is not None:
             while self._unvisited_contours:
                 return self._unvisited_contours.pop()
 
-            for contour in find_contours(self._unvisited_points):
+            for contour in find_contours(self._unvisited_mask):
                 for short_contour in contour.split(self._polygon_length):
                     if len(short_contour.points) == self._polygon_length:
                         self._unvisited_contours.append(short_contour)
@@ -210,34 +293,55 @@ class _PolygonGenerator:
         return self
 
     def __next__(self) -> Polygon:
-        if not self._unvisited_points:
+        if self._unvisited_count == 0:
             raise StopIteration
 
         polygon = self._next_contour() or self._next_random_polygon()
-        self._unvisited_points.difference_update(polygon_halo(polygon, self._margin))
+        halo = polygon_halo(polygon, self._margin)
+        self._unvisited_count -= self._unvisited_mask.remove_many(halo)
 
         return polygon
 
+    def _next_start_point(self) -> Point:
+        if self._start_point_stack is None:
+            self._start_point_stack = self._points_by_component()
+
+        while self._start_point_stack:
+            point = self._start_point_stack.pop()
+            if point in self._unvisited_mask:
+                return point
+
+        return self._unvisited_mask.first_point()
+
+    def _points_by_component(self) -> list[Point]:
+        _, labels_np = cv2.connectedComponents(self._unvisited_mask.to_numpy_mask(), connectivity=8)
+        ys, xs = numpy.nonzero(labels_np)
+        component_order = numpy.argsort(labels_np[ys, xs], kind="stable")[::-1]
+
+        return [Point(x, y) for x, y in zip(xs[component_order].tolist(), ys[component_order].tolist())]
+
     def _next_random_polygon(self) -> Polygon:
-        points = [next(iter(self._unvisited_points))]
-        visit_count = Counter(points)
+        points = [self._next_start_point()]
+        self._visit(points[0])
 
         def is_unvisited(point: Point) -> bool:
-            return point in self._unvisited_points and point not in visit_count
+            return point in self._unvisited_mask and self._visit_count_of(point) == 0
 
         while len(points) < self._polygon_length:
             max_length = self._polygon_length - len(points)
             last_point = points[-1]
             tail = find_path(last_point, self._points, max_length, is_unvisited)
             if tail:
-                visit_count.update(islice(tail.points, 1, None))
+                for point in islice(tail.points, 1, None):
+                    self._visit(point)
                 points.extend(islice(tail.points, 1, None))
                 continue
 
             first_point = points[0]
             head = find_path(first_point, self._points, max_length, is_unvisited)
             if head:
-                visit_count.update(islice(head.points, 1, None))
+                for point in islice(head.points, 1, None):
+                    self._visit(point)
                 head_points = list(reversed(head.points))
                 points, tail_points = head_points, points
                 points.extend(islice(tail_points, 1, None))
@@ -247,17 +351,17 @@ class _PolygonGenerator:
 
         while len(points) < self._polygon_length:
             last_point = points[-1]
-            tail_neighbor = self._find_least_visited_neighbor(last_point, visit_count, self._points)
+            tail_neighbor = self._find_least_visited_neighbor(last_point, self._points)
             if tail_neighbor:
                 points.append(tail_neighbor)
-                visit_count[tail_neighbor] += 1
+                self._visit(tail_neighbor)
                 continue
 
             first_point = points[0]
-            head_neighbor = self._find_least_visited_neighbor(first_point, visit_count, self._points)
+            head_neighbor = self._find_least_visited_neighbor(first_point, self._points)
             if head_neighbor:
                 points.insert(0, head_neighbor)
-                visit_count[head_neighbor] += 1
+                self._visit(head_neighbor)
                 continue
 
             break
@@ -266,21 +370,36 @@ class _PolygonGenerator:
         pad = self._polygon_length - len(points)
         points.extend(islice(repeat(last_point), pad))
 
+        self._clear_visits()
+
         return Polygon(tuple(points))
 
-    def _find_least_visited_neighbor(
-        self, point: Point, visit_count: Counter[Point], all_points: set[Point]
-    ) -> Point | None:
+    def _visit_count_of(self, point: Point) -> int:
+        return int(self._visit_count[point.y - self._visit_origin.y, point.x - self._visit_origin.x])
+
+    def _visit(self, point: Point) -> None:
+        count = self._visit_count_of(point) + 1
+        self._visit_count[point.y - self._visit_origin.y, point.x - self._visit_origin.x] = count
+        self._visited_points.append(point)
+        self._max_visit_count = max(self._max_visit_count, count)
+
+    def _clear_visits(self) -> None:
+        for point in self._visited_points:
+            self._visit_count[point.y - self._visit_origin.y, point.x - self._visit_origin.x] = 0
+        self._visited_points.clear()
+        self._max_visit_count = 0
+
+    def _find_least_visited_neighbor(self, point: Point, all_points: set[Point]) -> Point | None:
         least_visited_neighbor = None
-        min_visit_count = visit_count.most_common(1)[0][1] + 1
+        min_visit_count = self._max_visit_count + 1
         for neighbor in point.neighbors:
             if neighbor not in all_points:
                 continue
 
-            if neighbor in self._unvisited_points and neighbor not in visit_count:
+            neighbor_visit_count = self._visit_count_of(neighbor)
+            if neighbor in self._unvisited_mask and neighbor_visit_count == 0:
                 return neighbor
 
-            neighbor_visit_count = visit_count[neighbor]
             if neighbor_visit_count < min_visit_count:
                 least_visited_neighbor = neighbor
                 min_visit_count = neighbor_visit_count
@@ -293,18 +412,24 @@ def points_to_polygons(points: set[Point], polygon_length: int, margin: int) ->
 
 
 def polygons_to_points(polygons: Iterable[Polygon], margin: int) -> Iterator[Point]:
-    for polygon in polygons:
-        yield from polygon_halo(polygon, margin)
+    halos_np = [points_to_numpy(polygon_halo(polygon, margin)) for polygon in polygons]
+    if not halos_np:
+        return
+
+    all_points_np = numpy.concatenate(halos_np)
+    _, first_indices = numpy.unique(all_points_np, axis=0, return_index=True)
+    unique_points_np = all_points_np[numpy.sort(first_indices)]
+
+    yield from starmap(Point, unique_points_np.tolist())
 
 
 def points_bounding_rect(points: Iterable[Point]) -> Rect:
-    if not points:
+    points_np = points_to_numpy(points)
+    if points_np.size == 0:
         return Rect(Point(0, 0), Point(0, 0))
 
-    min_x = min(point.x for point in points)
-    min_y = min(point.y for point in points)
-    max_x = max(point.x for point in points)
-    max_y = max(point.y for point in points)
+    min_x, min_y = points_np.min(axis=0).tolist()
+    max_x, max_y = points_np.max(axis=0).tolist()
 
     return Rect(Point(min_x, min_y), Point(max_x, max_y))
 
@@ -321,22 +446,22 @@ def polygon_halo(polygon: Polygon, margin: int) -> set[Point]:
     if margin < 0:
         raise ValueError("Margin must be non-negative")
 
-    if margin == 0:
+    if margin == 0 or not polygon.points:
         return set(polygon.points)
 
-    queue = [(point, point) for point in polygon.points]
-
-    visited_points: set[Point] = set()
-    while queue:
-        polygon_point, halo_point = queue.pop(0)
-        visited_points.add(halo_point)
-        for neighbor in halo_point.neighbors:
-            if neighbor in visited_points:
-                continue
+    bounding_rect = polygon.bounding_rect
+    width = bounding_rect.size.width + 2 * margin
+    height = bounding_rect.size.height + 2 * margin
+    mask = numpy.zeros((height, width), dtype=numpy.uint8)
+    points_np = polygon.points_np
+    mask[points_np[:, 1] - bounding_rect.top + margin, points_np[:, 0] - bounding_rect.left + margin] = 1
 
-            if math.dist((polygon_point.x, polygon_point.y), (neighbor.x, neighbor.y)) > margin:
-                continue
+    kernel_range = numpy.arange(-margin, margin + 1)
+    kernel = (kernel_range[:, None] ** 2 + kernel_range[None, :] ** 2 <= margin * margin).astype(numpy.uint8)
+    halo_mask = cv2.dilate(mask, kernel)
 
-            queue.append((polygon_point, neighbor))
+    halo_ys, halo_xs = numpy.nonzero(halo_mask)
+    halo_xs += bounding_rect.left - margin
+    halo_ys += bounding_rect.top - margin
 
-    return visited_points
+    return set(starmap(Point, zip(halo_xs.tolist(), halo_ys.tolist())))
@@ -1,42 +1,45 @@
 from __future__ import annotations
 
-from io import BytesIO
+from functools import cached_property
+from itertools import starmap
 from pathlib import Path
 from typing import Iterable
 
+import numpy
 from PIL.Image import Image as PilImage
+from PIL.Image import fromarray as pil_fromarray
 from PIL.Image import open as pil_open
-from PIL.Image import new as pil_new
 from PIL.Image import Resampling as PilResampling
-import pymupdf
-from reportlab.graphics import renderPDF
-from svglib import svglib
 
-from img_to_swipes.geometry import Point, Rect, Size, points_bounding_rect
+from img_to_swipes.geometry import Point, Rect, Size, points_to_numpy
 
 
 class Image:
-    def __init__(self, pixels: Iterable[Point]) -> None:
-        self._pixels: list[Point] = list(dict.fromkeys(pixels))
-        self._content_bounding_rect: Rect = points_bounding_rect(self.pixels)
+    def __init__(self, pixels: Iterable[Point] | numpy.ndarray) -> None:
+        pixels_np = pixels if isinstance(pixels, numpy.ndarray) else points_to_numpy(pixels)
+        pixels_np = pixels_np.astype(numpy.int32, copy=False)
+
+        _, first_indices = numpy.unique(pixels_np, axis=0, return_index=True)
+        self._pixels_np: numpy.ndarray = pixels_np[numpy.sort(first_indices)]
+        self._content_bounding_rect: Rect = self._compute_content_bounding_rect()
 
     @staticmethod
-    def from_pixels(pixels: Iterable[Point]) -> Image:
+    def from_pixels(pixels: Iterable[Point] | numpy.ndarray) -> Image:
         return Image(pixels)
 
     @staticmethod
     def from_pil_image(image: PilImage, max_luminosity: int) -> Image:
-        black_pixels = []
-        gray_image = image.convert("LA")
-        for y in range(gray_image.height):
-            for x in range(gray_image.width):
-                pixel = gray_image.getpixel((x, y))
-                assert isinstance(pixel, tuple)
-                luminosity, alpha = pixel
-                if alpha > 0 and luminosity < max_luminosity:
-                    black_pixels.append(Point(x, y))
-
-        return Image.from_pixels(black_pixels)
+        if image.has_transparency_data:
+            gray_image = image if image.mode == "LA" else image.convert("LA")
+            pixels_np = numpy.asarray(gray_image)
+            luminosity_np = pixels_np[:, :, 0]
+            alpha_np = pixels_np[:, :, 1]
+            black_ys, black_xs = numpy.nonzero((alpha_np > 0) & (luminosity_np < max_luminosity))
+        else:
+            luminosity_np = numpy.asarray(image if image.mode == "L" else image.convert("L"))
+            black_ys, black_xs = numpy.nonzero(luminosity_np < max_luminosity)
+
+        return Image.from_pixels(numpy.column_stack((black_xs, black_ys)))
 
     @staticmethod
     def from_file(
@@ -47,9 +50,13 @@ class Image:
 
         return Image._from_any_file(path, max_width, max_height, max_luminosity)
 
-    @property
+    @cached_property
     def pixels(self) -> list[Point]:
-        return self._pixels
+        return list(starmap(Point, self._pixels_np.tolist()))
+
+    @property
+    def pixels_np(self) -> numpy.ndarray:
+        return self._pixels_np
 
     @property
     def size(self) -> Size:
@@ -60,11 +67,19 @@ class Image:
         return self._content_bounding_rect
 
     def to_pil_image(self) -> PilImage:
-        pil_image = pil_new("RGB", (self.size.width, self.size.height), color="white")
-        for pixel in self.pixels:
-            pil_image.putpixel((pixel.x, pixel.y), (0, 0, 0))
+        image_np = numpy.full((self.size.height, self.size.width, 3), 255, dtype=numpy.uint8)
+        image_np[self._pixels_np[:, 1], self._pixels_np[:, 0]] = 0
+
+        return pil_fromarray(image_np)
+
+    def _compute_content_bounding_rect(self) -> Rect:
+        if self._pixels_np.size == 0:
+            return Rect(Point(0, 0), Point(0, 0))
 
-        return pil_image
+        min_x, min_y = self._pixels_np.min(axis=0).tolist()
+        max_x, max_y = self._pixels_np.max(axis=0).tolist()
+
+        return Rect(Point(min_x, min_y), Point(max_x, max_y))
 
     @staticmethod
     def _from_any_file(path: Path, max_width: int, max_height: int, max_luminosity: int) -> Image:
@@ -74,20 +89,33 @@ class Image:
 
             scale_factor = min(max_width / pil_image.width, max_height / pil_image.height)
             new_size = (int(pil_image.width * scale_factor), int(pil_image.height * scale_factor))
+            if pil_image.format == "JPEG":
+                pil_image.draft("L", new_size)
+
             pil_image_resized = pil_image.resize(new_size, resample=PilResampling.LANCZOS)
 
             return Image.from_pil_image(pil_image_resized, max_luminosity)
 
     @staticmethod
     def _from_svg_file(path: Path, max_width: int, max_height: int, max_luminosity: int) -> Image:
-        drawing = svglib.svg2rlg(path.as_posix())
-        pdf = renderPDF.drawToString(drawing)
-        doc = pymupdf.Document(stream=pdf)
+        import cv2
+        import pymupdf
+
+        doc = pymupdf.Document(path.as_posix())
         page = doc.load_page(0)
 
         scale_factor = min(max_width / page.rect.width, max_height / page.rect.height)
         matrix = pymupdf.Matrix(scale_factor, scale_factor)
         pix = page.get_pixmap(matrix=matrix, alpha=True)
-        png_data = pix.tobytes("png")
-        with pil_open(BytesIO(png_data)) as pil_image:
-            return Image.from_pil_image(pil_image, max_luminosity)
+        rgba_np = numpy.frombuffer(pix.samples, numpy.uint8).reshape(pix.height, pix.width, pix.n)
+        alpha_np = rgba_np[:, :, 3]
+
+        # Pixmap samples are alpha-premultiplied; unmultiply the way MuPDF's PNG writer does
+        inverse_alpha_np = numpy.where(alpha_np > 0, 65280 // numpy.maximum(alpha_np, 1).astype(numpy.uint32), 0)
+        rgb_np = (rgba_np[:, :, :3].astype(numpy.uint32) * inverse_alpha_np[:, :, None] + 128) >> 8
+        rgb_np = numpy.minimum(rgb_np, 255).astype(numpy.uint8)
+
+        luminosity_np = cv2.cvtColor(rgb_np, cv2.COLOR_RGB2GRAY)
+        black_ys, black_xs = numpy.nonzero((alpha_np > 0) & (luminosity_np < max_luminosity))
+
+        return Image.from_pixels(numpy.column_stack((black_xs, black_ys)))
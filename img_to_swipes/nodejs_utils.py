@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 import os
 from dataclasses import dataclass
-from functools import lru_cache
+from functools import cache
 from pathlib import Path
 
 from nodejs import npm
@@ -21,12 +21,50 @@ class Package:
         return f"{self.name}@{self.version}"
 
 
-@lru_cache
+def _npm_manifest_stat() -> list[int]:
+    stats = []
+    for name in ("package.json", "package-lock.json"):
+        path = config.root_dir() / name
+        stats.append(path.stat().st_mtime_ns if path.exists() else 0)
+
+    return stats
+
+
+def _packages_cache_path() -> Path:
+    return config.artifacts_dir() / "npm_packages.json"
+
+
+def _load_cached_npm_packages() -> set[Package] | None:
+    try:
+        cached = json.loads(_packages_cache_path().read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if cached.get("manifest_stat") != _npm_manifest_stat():
+        return None
+
+    return {Package(name, version) for name, version in cached.get("packages", [])}
+
+
+def _save_cached_npm_packages(packages: set[Package]) -> None:
+    cached = {
+        "manifest_stat": _npm_manifest_stat(),
+        "packages": sorted((package.name, package.version) for package in packages),
+    }
+    _packages_cache_path().write_text(json.dumps(cached), encoding="utf-8")
+
+
+@cache
 def find_installed_npm_packages() -> set[Package]:
+    cached_packages = _load_cached_npm_packages()
+    if cached_packages is not None:
+        logger.info(f"Found {len(cached_packages)} installed npm packages (cached)")
+        return cached_packages
+
     logger.info("Querying installed npm packages...")
 
     try:
-        process = npm.run(["list", "--json"], capture_output=True, text=True, check=True)
+        process = npm.run(["list", "--depth=0", "--json"], capture_output=True, text=True, check=True)
     except Exception as e:
         raise RuntimeError("Failed to query installed npm packages") from e
 
@@ -38,11 +76,12 @@ def find_installed_npm_packages() -> set[Package]:
         packages.add(Package(package, version))
 
     logger.info(f"Found {len(packages)} installed npm packages")
+    _save_cached_npm_packages(packages)
 
     return set(packages)
 
 
-@lru_cache
+@cache
 def modules_root() -> Path:
     logger.info("Querying Node.js modules root directory...")
 
@@ -58,29 +97,53 @@ def modules_root() -> Path:
     return path
 
 
-def install_package(package_name: str, package_version: str) -> None:
-    package = Package(package_name, package_version)
-    if package in find_installed_npm_packages():
-        logger.info(f"Package '{package}' is already installed")
+@cache
+def _npm_env() -> dict[str, str]:
+    env = os.environ.copy()
+    env["PATH"] = os.pathsep.join([env.get("PATH", ""), config.nodejs_path().parent.as_posix()])
+
+    return env
+
+
+def install_packages(*packages: Package) -> None:
+    installed_packages = find_installed_npm_packages()
+    missing_packages = [package for package in packages if package not in installed_packages]
+    for package in packages:
+        if package not in missing_packages:
+            logger.info(f"Package '{package}' is already installed")
+
+    if not missing_packages:
         return
 
-    logger.info(f"Installing package '{package}'...")
+    package_specs = " ".join(str(package) for package in missing_packages)
+    logger.info(f"Installing packages '{package_specs}'...")
 
-    log_path = config.artifacts_dir() / f"install_{package}.log"
+    log_path = config.artifacts_dir() / f"install_{'_'.join(package.name for package in missing_packages)}.log"
     with open(log_path, "w", encoding='utf-8') as log_file:
         try:
-            env = os.environ.copy()
-            env["PATH"] = os.pathsep.join([env.get("PATH", ""), config.nodejs_path().parent.as_posix()])
-            npm.run(["install", str(package)], stdout=log_file, stderr=log_file, check=True, env=env)
+            npm.run(
+                ["install", *map(str, missing_packages)], stdout=log_file, stderr=log_file, check=True, env=_npm_env()
+            )
         except Exception as e:
-            raise RuntimeError(f"Failed to install '{package}'. See {log_path} for details") from e
+            raise RuntimeError(f"Failed to install '{package_specs}'. See {log_path} for details") from e
+
+    _packages_cache_path().unlink(missing_ok=True)
+    find_installed_npm_packages.cache_clear()
+
+    logger.info(f"Packages '{package_specs}' installed successfully")
+
+
+def install_package(package_name: str, package_version: str) -> None:
+    install_packages(Package(package_name, package_version))
+
 
-    logger.info(f"Package '{package}' installed successfully")
+APPIUM_PACKAGE = Package("appium", "2.19.0")
+UIAUTOMATOR_PACKAGE = Package("appium-uiautomator2-driver", "4.2.9")
 
 
 def install_appium() -> None:
-    install_package("appium", "2.19.0")
+    install_packages(APPIUM_PACKAGE)
 
 
 def install_uiautomator() -> None:
-    install_package("appium-uiautomator2-driver", "4.2.9")
+    install_packages(UIAUTOMATOR_PACKAGE)
@@ -1,5 +1,8 @@
 import atexit
-from functools import lru_cache
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cache
+from itertools import islice
 
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.actions import interaction
@@ -10,35 +13,72 @@ from img_to_swipes import config
 from img_to_swipes.geometry import Polygon
 
 
-@lru_cache
+@cache
 def _install_target_platform_dependencies() -> None:
     config.target_platform().install_dependencies()
 
 
-@lru_cache
+@cache
 def _start_target_platform_service() -> None:
     atexit.register(config.target_platform().stop_service)
     config.target_platform().start_service()
 
 
+def prepare_target_platform() -> None:
+    _install_target_platform_dependencies()
+    _start_target_platform_service()
+
+
 class Swiper:
+    _batch_size = 8
+    _max_pending_batches = 2
+
     def __init__(self, duration: int) -> None:
         _install_target_platform_dependencies()
         _start_target_platform_service()
 
-        driver = config.target_platform().make_driver()
-        self._actions = ActionChains(driver, duration=duration)
+        self._driver = config.target_platform().make_driver()
+        self._duration = duration
+        self._actions = self._make_actions()
+        self._pending_swipe_count = 0
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_batches: deque[Future[None]] = deque()
+
+    def _make_actions(self) -> ActionChains:
+        actions = ActionChains(self._driver, duration=self._duration)
         touch_input = PointerInput(interaction.POINTER_TOUCH, 'touch')
-        self._actions.w3c_actions = ActionBuilder(driver, mouse=touch_input, duration=duration)
+        actions.w3c_actions = ActionBuilder(self._driver, mouse=touch_input, duration=self._duration)
+
+        return actions
 
-    def swipe(self, polygon: Polygon) -> None:
+    def swipe(self, polygon: Polygon, dx: int = 0, dy: int = 0) -> None:
         if len(polygon.points) <= 1:
             return
 
+        pointer_action = self._actions.w3c_actions.pointer_action
         start = polygon.points[0]
-        self._actions.w3c_actions.pointer_action.move_to_location(start.x, start.y)
-        self._actions.w3c_actions.pointer_action.pointer_down()
-        for point in polygon.points:
-            self._actions.w3c_actions.pointer_action.move_to_location(point.x, point.y)
-        self._actions.w3c_actions.pointer_action.release()
-        self._actions.perform()
+        pointer_action.move_to_location(start.x + dx, start.y + dy)
+        pointer_action.pointer_down()
+        for point in islice(polygon.points, 1, None):
+            pointer_action.move_to_location(point.x + dx, point.y + dy)
+        pointer_action.release()
+
+        self._pending_swipe_count += 1
+        if self._pending_swipe_count >= self._batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending_swipe_count == 0:
+            return
+
+        while len(self._pending_batches) >= self._max_pending_batches:
+            self._pending_batches.popleft().result()
+
+        self._pending_batches.append(self._executor.submit(self._actions.perform))
+        self._actions = self._make_actions()
+        self._pending_swipe_count = 0
+
+    def finish(self) -> None:
+        self.flush()
+        while self._pending_batches:
+            self._pending_batches.popleft().result()
@@ -1,8 +1,13 @@
 import os
+import re
 import subprocess
+from functools import cached_property
 from pathlib import Path
-from time import sleep
-from typing import TextIO
+from random import Random
+from threading import Event
+from time import monotonic, sleep
+from typing import BinaryIO
+from urllib.request import urlopen
 
 from appium import webdriver
 from appium.options.android import UiAutomator2Options
@@ -11,83 +16,157 @@ from selenium.common.exceptions import WebDriverException
 
 from img_to_swipes import config
 from img_to_swipes.log import logger
-from img_to_swipes.nodejs_utils import install_appium, install_uiautomator, modules_root
+from img_to_swipes.nodejs_utils import APPIUM_PACKAGE, UIAUTOMATOR_PACKAGE, install_packages, modules_root
 from img_to_swipes.target_platforms.target_platform import ITargetPlatform
 
 
 class TargetPlatform(ITargetPlatform):
+    _adb_restart_markers = ("Could not find a connected Android device", "device offline", "connection refused")
+    _unrecoverable_markers = ("device unauthorized", "INSTRUMENTATION_FAILED", "Unable to locate Java Runtime")
+    _friendly_error_messages = {
+        "device unauthorized": "Device unauthorized. Check for a confirmation dialog on your device",
+        "Could not find a connected Android device":
+            "Device not found. Make sure your device is connected and USB debugging is enabled",
+    }
+    _friendly_error_pattern = re.compile("|".join(map(re.escape, _friendly_error_messages)))
+
     def __init__(self) -> None:
         self._appium_service: AppiumService = AppiumService()
-        self._appium_service_log: TextIO | None = None
+        self._appium_service_log: BinaryIO | None = None
+        self._retry_rng: Random = Random()
+        self._cancel_retries: Event = Event()
 
     @property
     def name(self) -> str:
         return "Android"
 
     def install_dependencies(self) -> None:
-        install_appium()
-        install_uiautomator()
+        install_packages(APPIUM_PACKAGE, UIAUTOMATOR_PACKAGE)
 
     def start_service(self) -> None:
         if self._appium_service.is_running:
             return
 
         if not self._appium_service_log:
-            self._appium_service_log = open(config.artifacts_dir() / "appium.log", "w", encoding='utf-8')
-
-        env = os.environ.copy()
-        env["ANDROID_HOME"] = (config.platform_tools_path() / "android").as_posix()
-        env["PATH"] = os.pathsep.join([env.get("PATH", ""), config.nodejs_path().parent.as_posix()])
-
-        main_script = modules_root() / MAIN_SCRIPT_PATH
+            self._appium_service_log = open(config.artifacts_dir() / "appium.log", "wb")
 
         logger.info("Starting Appium service for Android...")
         self._appium_service.start(
             node=config.nodejs_path(),
             npm="npm",
-            env=env,
+            env=self._service_env,
             stdout=self._appium_service_log,
             stderr=self._appium_service_log,
-            timeout_ms=120000,
-            main_script=main_script,
+            timeout_ms=0,
+            main_script=self._main_script,
         )
+        self._wait_until_service_ready(timeout=120)
         logger.info("Appium service for Android started successfully")
 
+    @cached_property
+    def _main_script(self) -> Path:
+        return modules_root() / MAIN_SCRIPT_PATH
+
+    @cached_property
+    def _service_env(self) -> dict[str, str]:
+        env = os.environ.copy()
+        env["ANDROID_HOME"] = (config.platform_tools_path() / "android").as_posix()
+        env["PATH"] = os.pathsep.join([env.get("PATH", ""), config.nodejs_path().parent.as_posix()])
+
+        return env
+
+    def _wait_until_service_ready(self, timeout: float, interval: float = 0.05) -> None:
+        deadline = monotonic() + timeout
+        while monotonic() < deadline:
+            if not self._appium_service.is_running:
+                raise RuntimeError("Appium service for Android exited during startup")
+
+            if self._is_service_ready():
+                return
+
+            sleep(interval)
+
+        raise RuntimeError(f"Appium service for Android is not ready after {timeout} seconds")
+
+    def _is_service_ready(self) -> bool:
+        try:
+            with urlopen("http://127.0.0.1:4723/status", timeout=1) as response:
+                return response.status < 400
+        except OSError:
+            return False
+
     def stop_service(self) -> None:
+        self._cancel_retries.set()
+        if not self._appium_service.is_running and self._appium_service_log is None:
+            return
+
         logger.info("Stopping Appium service for Android...")
-        if self._appium_service_log:
-            self._appium_service_log.close()
-            self._appium_service_log = None
+        try:
+            if self._appium_service.is_running:
+                self._appium_service.stop()
+        finally:
+            if self._appium_service_log:
+                self._appium_service_log.close()
+                self._appium_service_log = None
 
-        if self._appium_service.is_running:
-            self._appium_service.stop()
         logger.info("Appium service for Android stopped successfully")
 
     def make_driver(self) -> webdriver.Remote:
+        self._cancel_retries.clear()
+
+        options = UiAutomator2Options()
+        options.set_capability("appium:newCommandTimeout", 0)
+        options.set_capability("appium:waitForIdleTimeout", 0)
+
         attempt_count = 5
-        attempt_delay = 10
         for attempt in range(1, attempt_count + 1):
-            logger.info(f"Creating Appium driver for Android (attempt {attempt}/{attempt_count})...")
+            logger.info("Creating Appium driver for Android (attempt %d/%d)...", attempt, attempt_count)
             try:
-                driver = webdriver.Remote(options=UiAutomator2Options())
+                self._check_device_connected()
+                driver = webdriver.Remote(options=options)
                 logger.info("Appium driver for Android created successfully")
                 return driver
             except WebDriverException as e:
+                if self._is_unrecoverable(e):
+                    logger.error(self._make_friendly_error_message(e))
+                    raise
+
                 logger.warning(self._make_friendly_error_message(e))
                 if attempt < attempt_count:
-                    logger.info(f"Killing adb server and retrying in {attempt_delay} seconds...")
-                    sleep(attempt_delay)
-                    self._kill_adb()
+                    attempt_delay = self._backoff_delay(attempt)
+                    if self._should_restart_adb(e):
+                        logger.info("Killing adb server and retrying in %.1f seconds...", attempt_delay)
+                        self._wait_before_retry(attempt_delay)
+                        self._kill_adb()
+                    else:
+                        logger.info("Retrying in %.1f seconds...", attempt_delay)
+                        self._wait_before_retry(attempt_delay)
                 else:
                     logger.error(
                         "Exceeded maximum number of attempts to create Appium driver for Android. "
-                        f"Disconnect your device, disable/enable USB debugging, execute '{self._adb} kill-server', "
-                        "and then reconnect the device."
+                        "Disconnect your device, disable/enable USB debugging, execute '%s kill-server', "
+                        "and then reconnect the device.",
+                        self._adb,
                     )
                     raise
 
         raise RuntimeError("Failed to create Appium driver for Android")
 
+    def _wait_before_retry(self, delay: float) -> None:
+        if self._cancel_retries.wait(delay):
+            raise KeyboardInterrupt
+
+    def _backoff_delay(self, attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+        return self._retry_rng.uniform(0, min(cap, base * 2 ** attempt))
+
+    def _should_restart_adb(self, exception: WebDriverException) -> bool:
+        error_message = exception.msg or ""
+        return any(marker in error_message for marker in self._adb_restart_markers)
+
+    def _is_unrecoverable(self, exception: WebDriverException) -> bool:
+        error_message = exception.msg or ""
+        return any(marker in error_message for marker in self._unrecoverable_markers)
+
     @property
     def _adb(self) -> Path:
         return config.platform_tools_path() / "android" / "adb"
@@ -95,12 +174,26 @@ class TargetPlatform(ITargetPlatform):
     def _kill_adb(self) -> None:
         subprocess.run([self._adb, "kill-server"], check=False)
 
+    def _check_device_connected(self) -> None:
+        try:
+            process = subprocess.run([self._adb, "devices"], capture_output=True, text=True, timeout=5, check=True)
+        except (OSError, subprocess.SubprocessError):
+            return
+
+        device_statuses = [line.split("\t")[1] for line in process.stdout.splitlines()[1:] if "\t" in line]
+        if "device" in device_statuses:
+            return
+
+        if "unauthorized" in device_statuses:
+            raise WebDriverException("device unauthorized")
+
+        raise WebDriverException("Could not find a connected Android device")
+
     def _make_friendly_error_message(self, exception: WebDriverException) -> str:
         error_message = exception.msg or ""
 
-        if "device unauthorized" in error_message:
-            return "Device unauthorized. Check for a confirmation dialog on your device"
-        if "Could not find a connected Android device" in error_message:
-            return "Device not found. Make sure your device is connected and USB debugging is enabled"
+        match = self._friendly_error_pattern.search(error_message)
+        if match:
+            return self._friendly_error_messages[match.group(0)]
 
         return f"Failed to create Appium driver for Android: {error_message}"
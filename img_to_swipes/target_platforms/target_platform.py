@@ -1,6 +1,10 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
 
-from appium import webdriver
+if TYPE_CHECKING:
+    from appium import webdriver
 
 
 class ITargetPlatform(ABC):